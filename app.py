@@ -2,11 +2,14 @@ from flask import Flask, jsonify, render_template, request
 from flask_jwt_extended import JWTManager
 from encryption.tenseal_helper import tenseal_helper
 from storage.filesystem import ensure_directories, log_action
-from config import UPLOAD_FOLDER, RESULTS_FOLDER, LOGS_FOLDER, ENCRYPTION_ENABLED
+from storage.retention import start_retention_service, get_last_report, is_sweep_running, request_sweep
+from config import UPLOAD_FOLDER, RESULTS_FOLDER, LOGS_FOLDER, ENCRYPTION_ENABLED, RETENTION_ENABLED, RETENTION_INTERVAL, RETENTION_TTL
 import os
 
-def create_app():
+def create_app(debug=None):
     app = Flask(__name__)
+    if debug is not None:
+        app.debug = debug
     
     # JWT Configuration
     app.config['JWT_SECRET_KEY'] = 'your-secret-key-change-in-production'
@@ -56,14 +59,43 @@ def create_app():
             'max_file_size': 5 * 1024 * 1024,
             'upload_folder': UPLOAD_FOLDER,
             'results_folder': RESULTS_FOLDER,
-            'logs_folder': LOGS_FOLDER
+            'logs_folder': LOGS_FOLDER,
+            'retention_enabled': RETENTION_ENABLED,
+            'retention_interval': RETENTION_INTERVAL,
+            'retention_ttl': RETENTION_TTL
         })
     
+    @app.route('/retention', methods=['GET'])
+    def retention_status():
+        return jsonify({
+            'retention_enabled': RETENTION_ENABLED,
+            'last_sweep': get_last_report()
+        })
+    
+    @app.route('/retention/run', methods=['POST'])
+    def retention_run():
+        if is_sweep_running():
+            return jsonify({'error': 'A retention sweep is already running'}), 409
+        
+        # The sweep runs on the service thread, never in the request thread
+        if not request_sweep():
+            return jsonify({'error': 'Retention service is not running'}), 503
+        
+        return jsonify({
+            'message': 'Retention sweep scheduled',
+            'note': 'Check GET /retention for the report'
+        }), 202
+    
+    # Start background cleanup of uploads/ and results/ in the serving process only
+    # (with the debug reloader the parent process never handles requests)
+    if RETENTION_ENABLED and (not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+        start_retention_service()
+    
     # Log startup
     log_action('SYSTEM', 'STARTUP', f'Encryption enabled: {ENCRYPTION_ENABLED}')
     
     return app
 
 if __name__ == '__main__':
-    app = create_app()
+    app = create_app(debug=True)
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -6,6 +6,18 @@ MAX_FILE_SIZE = 5 * 1024 * 1024  # 5 MB max file size
 UPLOAD_FOLDER = 'uploads'
 RESULTS_FOLDER = 'results'
 LOGS_FOLDER = 'logs'
+FLOWS_FOLDER = 'flows'  # Links between IDs of one patient -> doctor -> lab flow
+
+# Retention / compaction of uploads and results
+RETENTION_ENABLED = True  # Run the background cleanup service
+RETENTION_INTERVAL = 15 * 60  # Seconds between cleanup sweeps
+RETENTION_TTL = {  # Max age in seconds per file stage (None = never expire)
+    '_encrypted': 24 * 60 * 60,
+    '_plaintext': 24 * 60 * 60,
+    '_for_lab': 6 * 60 * 60,
+    '_lab_result': 24 * 60 * 60,
+    '_result.txt': None,  # Patient diagnoses are kept unless a TTL is set
+}
 
 # TenSEAL parameters - using more compatible values
 POLY_MOD_DEGREE = 8192
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 from encryption.tenseal_helper import tenseal_helper
-from storage.filesystem import load_file, save_file, generate_file_id, log_action
+from storage.filesystem import load_file, save_file, generate_file_id, record_flow_link, log_action
 import os
 from config import UPLOAD_FOLDER
 
@@ -26,7 +26,11 @@ def view_report(file_id):
         else:
             return jsonify({'error': 'File not found'}), 404
         
-        file_content = load_file(file_path)
+        try:
+            file_content = load_file(file_path)
+        except FileNotFoundError:
+            # Removed by the retention service after the check above
+            return jsonify({'error': 'File not found'}), 404
         
         # Log that doctor viewed the file (no patient info visible)
         log_action('DOCTOR', 'VIEW_REPORT', f'File ID: {file_id}, Size: {len(file_content)} bytes')
@@ -94,9 +98,15 @@ def send_to_lab():
         
         print(f"✓ Found source file: {source_path}")
         
-        # Read the file content
-        with open(source_path, 'rb') as f:
-            file_content = f.read()
+        # Read the file content (the retention service may have removed it since the check above)
+        try:
+            with open(source_path, 'rb') as f:
+                file_content = f.read()
+        except FileNotFoundError:
+            return jsonify({
+                'error': f'File not found. Searched for: {encrypted_path} and {plaintext_path}',
+                'available_files': os.listdir(UPLOAD_FOLDER) if os.path.exists(UPLOAD_FOLDER) else []
+            }), 404
         
         print(f"✓ Read file content, size: {len(file_content)} bytes")
         
@@ -109,6 +119,7 @@ def send_to_lab():
         # Write the content to the lab file
         with open(lab_file_path, 'wb') as f:
             f.write(file_content)
+        record_flow_link(lab_file_id, file_id)
         
         print(f"✓ Created lab file: {lab_file_path}")
         
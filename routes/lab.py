@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 from encryption.tenseal_helper import tenseal_helper
-from storage.filesystem import load_file, save_file, generate_file_id, log_action
+from storage.filesystem import load_file, save_file, generate_file_id, record_flow_link, log_action
 import os
 from config import UPLOAD_FOLDER
 import tenseal as ts
@@ -28,7 +28,11 @@ def process_data():
         if not os.path.exists(file_path):
             return jsonify({'error': 'File not found'}), 404
         
-        encrypted_data = load_file(file_path)
+        try:
+            encrypted_data = load_file(file_path)
+        except FileNotFoundError:
+            # Removed by the retention service after the check above
+            return jsonify({'error': 'File not found'}), 404
         
         log_action('LAB', 'PROCESS_START', f'Processing file ID: {lab_file_id}')
         
@@ -49,6 +53,7 @@ def process_data():
                 result_path = os.path.join(UPLOAD_FOLDER, f"{result_file_id}_lab_result.bin")
                 with open(result_path, 'wb') as f:
                     f.write(processed_result)
+                record_flow_link(result_file_id, lab_file_id)
                 
                 log_action('LAB', 'PROCESS_FALLBACK', f'Fallback processing completed for {lab_file_id}')
                 
@@ -73,6 +78,7 @@ def process_data():
             result_path = os.path.join(UPLOAD_FOLDER, f"{result_file_id}_lab_result.bin")
             with open(result_path, 'wb') as f:
                 f.write(processed_result)
+            record_flow_link(result_file_id, lab_file_id)
             
             log_action('LAB', 'PROCESS_COMPLETE', f'Computation completed for {lab_file_id}')
             
@@ -97,6 +103,7 @@ def process_data():
             result_path = os.path.join(UPLOAD_FOLDER, f"{result_file_id}_lab_result.bin")
             with open(result_path, 'wb') as f:
                 f.write(processed_result)
+            record_flow_link(result_file_id, lab_file_id)
             
             return jsonify({
                 'message': 'Computation completed with fallback method',
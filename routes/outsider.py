@@ -35,7 +35,15 @@ def inspect_traffic(file_id):
                 'intercepted': False
             }), 404
         
-        file_content = load_file(file_path)
+        try:
+            file_content = load_file(file_path)
+        except FileNotFoundError:
+            # Removed by the retention service after the check above
+            return jsonify({
+                'error': 'File not found',
+                'file_id': file_id,
+                'intercepted': False
+            }), 404
         
         log_action('OUTSIDER', 'INSPECT_TRAFFIC', f'File ID: {file_id}, Type: {content_type}, Size: {len(file_content)} bytes')
         
@@ -76,7 +84,11 @@ def inspect_all_traffic():
             if filename.endswith('.bin'):
                 file_id = filename.split('_')[0]
                 file_path = os.path.join(UPLOAD_FOLDER, filename)
-                file_content = load_file(file_path)
+                try:
+                    file_content = load_file(file_path)
+                except FileNotFoundError:
+                    # Removed by the retention service while listing
+                    continue
                 
                 # Determine content type and readability
                 content_type = "encrypted" if "_encrypted" in filename else "plaintext" if "_plaintext" in filename else "lab_processing"
@@ -83,8 +83,12 @@ def view_result(file_id):
         result_path = os.path.join('results', f"{file_id}_result.txt")
         
         if os.path.exists(result_path):
-            with open(result_path, 'r') as f:
-                result = f.read()
+            try:
+                with open(result_path, 'r') as f:
+                    result = f.read()
+            except FileNotFoundError:
+                # Removed by the retention service after the check above
+                return jsonify({'error': 'Result not found'}), 404
             
             log_action('PATIENT', 'VIEW_RESULT', f'File ID: {file_id}')
             return jsonify({
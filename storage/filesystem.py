@@ -1,13 +1,14 @@
 import os
 import uuid
 from datetime import datetime
-from config import UPLOAD_FOLDER, RESULTS_FOLDER, LOGS_FOLDER
+from config import UPLOAD_FOLDER, RESULTS_FOLDER, LOGS_FOLDER, FLOWS_FOLDER
 
 def ensure_directories():
     """Create necessary directories"""
     os.makedirs(UPLOAD_FOLDER, exist_ok=True)
     os.makedirs(RESULTS_FOLDER, exist_ok=True)
     os.makedirs(LOGS_FOLDER, exist_ok=True)
+    os.makedirs(FLOWS_FOLDER, exist_ok=True)
 
 def save_file(file_data, filename=None, folder=None):
     """Save file to specified folder with unique name"""
@@ -31,6 +32,13 @@ def generate_file_id():
     """Generate unique file ID"""
     return str(uuid.uuid4())
 
+def record_flow_link(child_id, parent_id):
+    """Record that child_id was derived from parent_id (used by retention)"""
+    os.makedirs(FLOWS_FOLDER, exist_ok=True)
+    link_path = os.path.join(FLOWS_FOLDER, f"{child_id}.link")
+    with open(link_path, 'w') as f:
+        f.write(parent_id)
+
 def log_action(role, action, details=""):
     """Log audit trail"""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -0,0 +1,229 @@
+import os
+import threading
+import time
+from datetime import datetime
+from config import UPLOAD_FOLDER, RESULTS_FOLDER, FLOWS_FOLDER, RETENTION_INTERVAL, RETENTION_TTL
+from storage.filesystem import log_action
+
+_service_thread = None
+_stop_event = threading.Event()
+_trigger_event = threading.Event()
+_sweep_lock = threading.Lock()
+_report_lock = threading.Lock()
+_last_report = None
+
+# Stored file suffix for each retention stage
+_STAGE_SUFFIXES = {
+    '_encrypted': '_encrypted.bin',
+    '_plaintext': '_plaintext.bin',
+    '_for_lab': '_for_lab.bin',
+    '_lab_result': '_lab_result.bin',
+    '_result.txt': '_result.txt',
+}
+
+def _split_name(filename):
+    """Return (file_id, stage) for a stored file, or (None, None) if unknown"""
+    for stage, suffix in _STAGE_SUFFIXES.items():
+        if filename.endswith(suffix):
+            return filename[:-len(suffix)], stage
+    return None, None
+
+def _load_flow_links():
+    """Return {child_id: parent_id} for every recorded flow link"""
+    links = {}
+    if not os.path.isdir(FLOWS_FOLDER):
+        return links
+    with os.scandir(FLOWS_FOLDER) as it:
+        for entry in it:
+            if not entry.name.endswith('.link'):
+                continue
+            try:
+                with open(entry.path, 'r') as f:
+                    links[entry.name[:-len('.link')]] = f.read().strip()
+            except FileNotFoundError:
+                continue
+    return links
+
+def _flow_chain(file_id, links):
+    """Return file_id followed by every ID it was derived from, up to the upload ID"""
+    chain = [file_id]
+    while chain[-1] in links:
+        parent_id = links[chain[-1]]
+        if parent_id in chain:
+            break
+        chain.append(parent_id)
+    return chain
+
+def _remove(path, size, report, stage):
+    """Delete one file and record the reclaimed space"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        # Already gone (removed by a route or another sweep)
+        return
+    report['files_removed'] += 1
+    report['bytes_reclaimed'] += size
+    stage_stats = report['by_stage'].setdefault(stage, {'files': 0, 'bytes': 0})
+    stage_stats['files'] += 1
+    stage_stats['bytes'] += size
+
+def compact_storage(now=None):
+    """Remove expired artifacts and the intermediates of completed flows"""
+    # Only one sweep at a time, whether from the service or a direct call
+    with _sweep_lock:
+        return _sweep(now)
+
+def _sweep(now):
+    if now is None:
+        now = time.time()
+
+    report = {
+        'started_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'files_scanned': 0,
+        'files_removed': 0,
+        'bytes_reclaimed': 0,
+        'links_removed': 0,
+        'by_stage': {}
+    }
+
+    # Links are written after their file, so reading them first guarantees
+    # every file a snapshot link points at is part of the snapshot below.
+    # Links written later are handled when pruning at the end.
+    links = _load_flow_links()
+
+    # Snapshot directory contents once so lookups don't hit the disk again
+    entries = []
+    for folder in (UPLOAD_FOLDER, RESULTS_FOLDER):
+        if not os.path.isdir(folder):
+            continue
+        with os.scandir(folder) as it:
+            for entry in it:
+                if entry.is_file():
+                    entries.append(entry)
+
+    # A flow is identified by its upload ID, the last ID in every chain.
+    # Map each completed flow to the time of its latest diagnosis.
+    completed_roots = {}
+    for entry in entries:
+        file_id, stage = _split_name(entry.name)
+        if stage != '_result.txt':
+            continue
+        try:
+            diagnosed_at = entry.stat().st_mtime
+        except FileNotFoundError:
+            continue
+        root_id = _flow_chain(file_id, links)[-1]
+        completed_roots[root_id] = max(diagnosed_at, completed_roots.get(root_id, diagnosed_at))
+
+    # Diagnoses are not counted: they never need a link once the flow is complete
+    surviving_ids = set()
+    for entry in entries:
+        file_id, stage = _split_name(entry.name)
+        if stage is None:
+            continue
+        report['files_scanned'] += 1
+
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+
+        ttl = RETENTION_TTL.get(stage)
+        expired = ttl is not None and now - stat.st_mtime > ttl
+        # A diagnosis for any ID in the flow means the intermediates that existed
+        # before it are no longer needed; newer ones belong to work still in progress
+        completed = False
+        if stage != '_result.txt':
+            diagnosed_at = completed_roots.get(_flow_chain(file_id, links)[-1])
+            completed = diagnosed_at is not None and stat.st_mtime <= diagnosed_at
+
+        if expired or completed:
+            _remove(entry.path, stat.st_size, report, stage)
+        elif stage != '_result.txt':
+            surviving_ids.add(file_id)
+
+    # Drop links that no remaining file needs to reach its upload ID. Routes may
+    # have written files and links since the snapshot, so re-read the links and
+    # keep any link whose child is still the parent of another link on disk.
+    # Only links from the snapshot are candidates: newer ones may belong to
+    # files the snapshot never saw.
+    current_links = _load_flow_links()
+    needed_ids = set()
+    for file_id in surviving_ids:
+        needed_ids.update(_flow_chain(file_id, current_links))
+
+    candidates = [child_id for child_id in links if child_id not in needed_ids]
+    pruned = True
+    while pruned:
+        pruned = False
+        parent_ids = set(current_links.values())
+        for child_id in candidates:
+            if child_id not in current_links or child_id in parent_ids:
+                continue
+            del current_links[child_id]
+            pruned = True
+            try:
+                os.remove(os.path.join(FLOWS_FOLDER, f"{child_id}.link"))
+                report['links_removed'] += 1
+            except FileNotFoundError:
+                pass
+
+    if report['files_removed']:
+        log_action('SYSTEM', 'RETENTION_SWEEP',
+                   f"Removed {report['files_removed']} files, reclaimed {report['bytes_reclaimed']} bytes")
+
+    global _last_report
+    with _report_lock:
+        _last_report = report
+    return report
+
+def get_last_report():
+    """Return the report from the most recent sweep (None before the first one)"""
+    with _report_lock:
+        return _last_report
+
+def is_sweep_running():
+    """Return True while a sweep holds the sweep lock"""
+    return _sweep_lock.locked()
+
+def request_sweep():
+    """Wake the service thread to sweep now; False if the service isn't running"""
+    if _service_thread is None or not _service_thread.is_alive():
+        return False
+    _trigger_event.set()
+    return True
+
+def _run_service(interval):
+    # Wait a full interval first so nothing is deleted at startup
+    while True:
+        _trigger_event.wait(interval)
+        _trigger_event.clear()
+        if _stop_event.is_set():
+            break
+        try:
+            compact_storage()
+        except Exception as e:
+            print(f"✗ Retention sweep failed: {e}")
+            log_action('SYSTEM', 'RETENTION_ERROR', str(e))
+
+def start_retention_service(interval=None):
+    """Start the background cleanup thread (no-op if already running)"""
+    global _service_thread
+    if interval is None:
+        interval = RETENTION_INTERVAL
+
+    if _service_thread is not None and _service_thread.is_alive():
+        return _service_thread
+
+    _stop_event.clear()
+    _trigger_event.clear()
+    _service_thread = threading.Thread(target=_run_service, args=(interval,),
+                                       name='retention-service', daemon=True)
+    _service_thread.start()
+    print(f"✓ Retention service started (interval: {interval}s)")
+    return _service_thread
+
+def stop_retention_service():
+    """Signal the background cleanup thread to exit"""
+    _stop_event.set()
+    _trigger_event.set()
\ No newline at end of file
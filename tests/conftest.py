@@ -0,0 +1,27 @@
+import pytest
+import app as app_module
+import storage.retention as retention
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run in an empty directory so uploads/results/flows/logs are temporary"""
+    monkeypatch.chdir(tmp_path)
+    for folder in ('uploads', 'results', 'flows', 'logs'):
+        (tmp_path / folder).mkdir()
+    return tmp_path
+
+@pytest.fixture
+def client(workdir, monkeypatch):
+    """Flask test client with the retention service left to each test"""
+    monkeypatch.setattr(app_module, 'RETENTION_ENABLED', False)
+    app = app_module.create_app()
+    app.testing = True
+    return app.test_client()
+
+@pytest.fixture
+def service(workdir):
+    """Running retention service that only sweeps when triggered"""
+    thread = retention.start_retention_service(interval=60 * 60)
+    yield thread
+    retention.stop_retention_service()
+    thread.join(timeout=5)
\ No newline at end of file
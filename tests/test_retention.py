@@ -0,0 +1,239 @@
+import os
+import time
+import pytest
+import storage.filesystem as filesystem
+import storage.retention as retention
+from storage.filesystem import record_flow_link
+
+NOW = 1_000_000_000
+HOUR = 60 * 60
+
+@pytest.fixture
+def folders(tmp_path, monkeypatch):
+    """Point retention at a temporary uploads/results/flows tree"""
+    uploads = tmp_path / 'uploads'
+    results = tmp_path / 'results'
+    flows = tmp_path / 'flows'
+    logs = tmp_path / 'logs'
+    for folder in (uploads, results, flows, logs):
+        folder.mkdir()
+
+    monkeypatch.setattr(retention, 'UPLOAD_FOLDER', str(uploads))
+    monkeypatch.setattr(retention, 'RESULTS_FOLDER', str(results))
+    monkeypatch.setattr(retention, 'FLOWS_FOLDER', str(flows))
+    monkeypatch.setattr(filesystem, 'FLOWS_FOLDER', str(flows))
+    monkeypatch.setattr(filesystem, 'LOGS_FOLDER', str(logs))
+    monkeypatch.setattr(retention, 'RETENTION_TTL', {
+        '_encrypted': 24 * HOUR,
+        '_plaintext': 24 * HOUR,
+        '_for_lab': 6 * HOUR,
+        '_lab_result': 24 * HOUR,
+        '_result.txt': None,
+    })
+    return uploads, results, flows
+
+def write(folder, name, size, age=0):
+    """Create a file of `size` bytes last modified `age` seconds before NOW"""
+    path = folder / name
+    path.write_bytes(b'x' * size)
+    os.utime(path, (NOW - age, NOW - age))
+    return path
+
+def test_completed_flow_is_cleaned_up(folders):
+    uploads, results, flows = folders
+    write(uploads, 'A_encrypted.bin', 100)
+    write(uploads, 'B_for_lab.bin', 200)
+    record_flow_link('B', 'A')
+    write(uploads, 'C_lab_result.bin', 300)
+    record_flow_link('C', 'B')
+    write(results, 'A_result.txt', 10)
+    # Unrelated flow still in progress
+    write(uploads, 'D_encrypted.bin', 50)
+
+    report = retention.compact_storage(now=NOW)
+
+    assert sorted(os.listdir(uploads)) == ['D_encrypted.bin']
+    assert os.listdir(results) == ['A_result.txt']
+    assert os.listdir(flows) == []
+    assert report['files_removed'] == 3
+    assert report['bytes_reclaimed'] == 600
+    assert report['links_removed'] == 2
+    assert report['by_stage'] == {
+        '_encrypted': {'files': 1, 'bytes': 100},
+        '_for_lab': {'files': 1, 'bytes': 200},
+        '_lab_result': {'files': 1, 'bytes': 300},
+    }
+
+def test_diagnosis_keyed_by_lab_result_id_completes_flow(folders):
+    uploads, results, flows = folders
+    write(uploads, 'A_encrypted.bin', 100, age=3 * HOUR)
+    write(uploads, 'B_for_lab.bin', 200, age=2 * HOUR)
+    record_flow_link('B', 'A')
+    write(uploads, 'C_lab_result.bin', 300, age=2 * HOUR)
+    record_flow_link('C', 'B')
+    write(results, 'C_result.txt', 10, age=HOUR)
+    write(uploads, 'E_for_lab.bin', 400, age=3 * HOUR)
+    record_flow_link('E', 'A')
+
+    report = retention.compact_storage(now=NOW)
+
+    # C resolves to upload A, so every branch of A's flow is complete
+    assert os.listdir(uploads) == []
+    assert os.listdir(results) == ['C_result.txt']
+    assert os.listdir(flows) == []
+    assert report['by_stage'] == {
+        '_encrypted': {'files': 1, 'bytes': 100},
+        '_for_lab': {'files': 2, 'bytes': 600},
+        '_lab_result': {'files': 1, 'bytes': 300},
+    }
+
+def test_branch_created_after_diagnosis_is_kept(folders):
+    uploads, results, flows = folders
+    write(uploads, 'A_encrypted.bin', 100, age=3 * HOUR)
+    write(uploads, 'B_for_lab.bin', 200, age=2 * HOUR)
+    record_flow_link('B', 'A')
+    write(results, 'A_result.txt', 10, age=HOUR)
+    # The doctor forwards A to the lab again after the diagnosis
+    write(uploads, 'E_for_lab.bin', 400)
+    record_flow_link('E', 'A')
+
+    report = retention.compact_storage(now=NOW)
+
+    assert os.listdir(uploads) == ['E_for_lab.bin']
+    assert os.listdir(flows) == ['E.link']
+    assert report['by_stage'] == {
+        '_encrypted': {'files': 1, 'bytes': 100},
+        '_for_lab': {'files': 1, 'bytes': 200},
+    }
+
+def test_expired_files_are_removed_per_stage_ttl(folders):
+    uploads, results, flows = folders
+    write(uploads, 'A_for_lab.bin', 200, age=7 * HOUR)
+    write(uploads, 'B_encrypted.bin', 100, age=7 * HOUR)
+    write(uploads, 'C_plaintext.bin', 40, age=25 * HOUR)
+    write(results, 'D_result.txt', 10, age=365 * 24 * HOUR)
+    write(uploads, 'notes.txt', 5, age=365 * 24 * HOUR)
+
+    report = retention.compact_storage(now=NOW)
+
+    assert sorted(os.listdir(uploads)) == ['B_encrypted.bin', 'notes.txt']
+    # Diagnoses never expire with a TTL of None
+    assert os.listdir(results) == ['D_result.txt']
+    assert report['files_scanned'] == 4
+    assert report['by_stage'] == {
+        '_for_lab': {'files': 1, 'bytes': 200},
+        '_plaintext': {'files': 1, 'bytes': 40},
+    }
+
+def test_link_kept_while_a_descendant_survives(folders):
+    uploads, results, flows = folders
+    write(uploads, 'A_encrypted.bin', 100, age=25 * HOUR)
+    write(uploads, 'B_for_lab.bin', 200)
+    record_flow_link('B', 'A')
+
+    retention.compact_storage(now=NOW)
+
+    assert os.listdir(uploads) == ['B_for_lab.bin']
+    assert os.listdir(flows) == ['B.link']
+
+    # Once the diagnosis arrives the rest of the flow still resolves to A
+    write(results, 'A_result.txt', 10)
+    report = retention.compact_storage(now=NOW)
+
+    assert os.listdir(uploads) == []
+    assert os.listdir(flows) == []
+    assert report['by_stage'] == {'_for_lab': {'files': 1, 'bytes': 200}}
+
+def test_link_written_during_sweep_keeps_its_parent_link(folders, monkeypatch):
+    uploads, results, flows = folders
+    write(uploads, 'A_encrypted.bin', 100)
+    write(uploads, 'B_for_lab.bin', 200, age=7 * HOUR)
+    record_flow_link('B', 'A')
+
+    load_flow_links = retention._load_flow_links
+    calls = []
+
+    def load_then_process(*args):
+        links = load_flow_links(*args)
+        if not calls:
+            # The lab finishes processing B right after the sweep reads the links
+            write(uploads, 'C_lab_result.bin', 300)
+            record_flow_link('C', 'B')
+        calls.append(links)
+        return links
+
+    monkeypatch.setattr(retention, '_load_flow_links', load_then_process)
+    retention.compact_storage(now=NOW)
+    monkeypatch.setattr(retention, '_load_flow_links', load_flow_links)
+
+    assert sorted(os.listdir(uploads)) == ['A_encrypted.bin', 'C_lab_result.bin']
+    assert sorted(os.listdir(flows)) == ['B.link', 'C.link']
+
+    # C still resolves to upload A, so A's diagnosis completes it
+    write(results, 'A_result.txt', 10)
+    retention.compact_storage(now=NOW)
+
+    assert os.listdir(uploads) == []
+    assert os.listdir(flows) == []
+
+def test_last_report_is_recorded(folders):
+    uploads, results, flows = folders
+    write(uploads, 'A_for_lab.bin', 200, age=7 * HOUR)
+
+    report = retention.compact_storage(now=NOW)
+
+    assert retention.get_last_report() == report
+    assert not retention.is_sweep_running()
+
+def wait_for_new_report(previous, timeout=5):
+    """Poll until the service has published a report other than `previous`"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        report = retention.get_last_report()
+        if report is not previous:
+            return report
+        time.sleep(0.01)
+    raise AssertionError('retention service did not sweep')
+
+def test_service_sweeps_when_requested(service, workdir):
+    old_file = workdir / 'uploads' / 'A_for_lab.bin'
+    old_file.write_bytes(b'x' * 200)
+    old_time = time.time() - 7 * HOUR
+    os.utime(old_file, (old_time, old_time))
+    previous = retention.get_last_report()
+
+    assert retention.request_sweep()
+    report = wait_for_new_report(previous)
+
+    assert not old_file.exists()
+    assert report['by_stage'] == {'_for_lab': {'files': 1, 'bytes': 200}}
+
+def test_service_stops(workdir):
+    thread = retention.start_retention_service(interval=60 * 60)
+    assert retention.start_retention_service() is thread
+
+    retention.stop_retention_service()
+    thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert not retention.request_sweep()
+
+def test_run_endpoint_without_service(client):
+    response = client.post('/retention/run')
+
+    assert response.status_code == 503
+
+def test_run_endpoint_wakes_service(client, service):
+    previous = retention.get_last_report()
+
+    response = client.post('/retention/run')
+
+    assert response.status_code == 202
+    report = wait_for_new_report(previous)
+    assert client.get('/retention').get_json()['last_sweep'] == report
+
+def test_run_endpoint_while_sweeping(client, service):
+    with retention._sweep_lock:
+        response = client.post('/retention/run')
+
+    assert response.status_code == 409
\ No newline at end of file
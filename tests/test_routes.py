@@ -0,0 +1,58 @@
+import storage.retention as retention
+import routes.doctor
+import routes.lab
+
+def test_send_to_lab_records_flow_link(client, workdir):
+    (workdir / 'uploads' / 'A_plaintext.bin').write_bytes(b'report')
+
+    response = client.post('/doctor/send-to-lab', json={'file_id': 'A'})
+
+    assert response.status_code == 200
+    lab_file_id = response.get_json()['lab_file_id']
+    assert (workdir / 'uploads' / f'{lab_file_id}_for_lab.bin').read_bytes() == b'report'
+    assert (workdir / 'flows' / f'{lab_file_id}.link').read_text() == 'A'
+
+def test_lab_process_records_flow_link(client, workdir):
+    (workdir / 'uploads' / 'B_for_lab.bin').write_bytes(b'report')
+
+    response = client.post('/lab/process', json={'lab_file_id': 'B'})
+
+    assert response.status_code == 200
+    result_file_id = response.get_json()['result_file_id']
+    assert (workdir / 'uploads' / f'{result_file_id}_lab_result.bin').exists()
+    assert (workdir / 'flows' / f'{result_file_id}.link').read_text() == 'B'
+
+def test_flow_from_routes_is_cleaned_up(client, workdir):
+    (workdir / 'uploads' / 'A_plaintext.bin').write_bytes(b'report')
+    lab_file_id = client.post('/doctor/send-to-lab', json={'file_id': 'A'}).get_json()['lab_file_id']
+    client.post('/lab/process', json={'lab_file_id': lab_file_id})
+    client.post('/doctor/return-result', json={'file_id': 'A', 'diagnosis': 'healthy'})
+
+    retention.compact_storage()
+
+    assert list((workdir / 'uploads').iterdir()) == []
+    assert list((workdir / 'flows').iterdir()) == []
+    assert client.get('/patient/view-result/A').get_json()['result'] == 'healthy'
+
+def test_lab_process_file_removed_after_check(client, workdir, monkeypatch):
+    (workdir / 'uploads' / 'B_for_lab.bin').write_bytes(b'report')
+
+    def removed(filepath):
+        raise FileNotFoundError(filepath)
+    monkeypatch.setattr(routes.lab, 'load_file', removed)
+
+    response = client.post('/lab/process', json={'lab_file_id': 'B'})
+
+    assert response.status_code == 404
+    assert response.get_json() == {'error': 'File not found'}
+
+def test_doctor_view_file_removed_after_check(client, workdir, monkeypatch):
+    (workdir / 'uploads' / 'A_plaintext.bin').write_bytes(b'report')
+
+    def removed(filepath):
+        raise FileNotFoundError(filepath)
+    monkeypatch.setattr(routes.doctor, 'load_file', removed)
+
+    response = client.get('/doctor/view/A')
+
+    assert response.status_code == 404
\ No newline at end of file